@@ -21,7 +21,7 @@ load_dotenv()
 def update_requirements_file():
     """Creates or updates requirements.txt with the correct dependencies."""
     with open("requirements.txt", "w") as f:
-        f.write("""streamlit>=1.28.0
+        f.write("""streamlit>=1.37.0
 openai>=1.1.0
 python-dotenv>=1.0.0
 langchain>=0.0.335
@@ -43,7 +43,7 @@ def main():
         render_ui()
         
     except Exception as e:
-        logger.error(f"Application error: {e}", exc_info=True)
+        logger.error("Application error: %s", e, exc_info=True)
         import streamlit as st
         st.error(f"An unexpected error occurred: {str(e)}")
         st.error("Please check the logs for more information or contact support.")
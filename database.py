@@ -1,15 +1,21 @@
 import os
 import logging
+import threading
+from types import MappingProxyType
 import pymongo
 from pymongo import MongoClient
+from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import SecondaryPreferred
 import streamlit as st
 from dotenv import load_dotenv
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
+# Load environment variables, unless app.py has already loaded them
+if os.getenv("MONGODB_URI") is None:
+    load_dotenv()
 
 # Define a fallback menu for testing if the database is not available
 FALLBACK_MENU = [
@@ -26,6 +32,21 @@ FALLBACK_MENU = [
     {"name": "Topo Chico", "price": 3.49, "calories": 0, "category": "Drinks"},
 ]
 
+# Fallback menu grouped by category, built once for O(1) category lookups
+_FALLBACK_BY_CATEGORY = {}
+for _item in FALLBACK_MENU:
+    _FALLBACK_BY_CATEGORY.setdefault(_item["category"], []).append(_item)
+_FALLBACK_BY_CATEGORY = {k: tuple(v) for k, v in _FALLBACK_BY_CATEGORY.items()}
+
+# Fields returned by menu queries, shared by every menu lookup; only what
+# the app reads, to keep BSON decoding and network transfer small
+MENU_PROJECTION = {"_id": 0, "name": 1, "price": 1, "calories": 1, "category": 1}
+MENU_BATCH_SIZE = 1000
+# Menu reads are cached for an hour anyway, so a slightly stale secondary is
+# fine; this keeps them off the primary, which serves order writes
+MENU_READ_PREFERENCE = SecondaryPreferred(max_staleness=120)
+MENU_READ_CONCERN = ReadConcern("local")
+
 # MongoDB connection string getter
 def get_mongodb_uri():
     """Get MongoDB connection string from environment variables or Streamlit secrets."""
@@ -41,90 +62,162 @@ def get_mongodb_uri():
 
 # Global connection pool
 _mongodb_client = None
+_mongodb_db = None
+# Set once a client has been attempted so a missing or invalid
+# configuration is not retried on every menu query
+_mongodb_connect_attempted = False
+# Streamlit serves each session on its own thread; guard client creation
+_mongodb_lock = threading.Lock()
+# Menu indexes are created once per process
+_indexes_ensured = False
 
 def get_mongodb_client():
-    """Get or create a MongoDB client."""
-    global _mongodb_client
+    """Get or create the process-wide pooled MongoDB client."""
+    global _mongodb_client, _mongodb_connect_attempted
     
-    if _mongodb_client is None:
-        mongodb_uri = get_mongodb_uri()
-        if not mongodb_uri:
-            return None
-        
-        try:
-            _mongodb_client = MongoClient(mongodb_uri)
-            # Test the connection
-            _mongodb_client.admin.command('ping')
-            logger.info("MongoDB connection established")
-        except Exception as e:
-            logger.error(f"MongoDB connection error: {e}")
-            _mongodb_client = None
+    if _mongodb_client is None and not _mongodb_connect_attempted:
+        with _mongodb_lock:
+            if _mongodb_client is None and not _mongodb_connect_attempted:
+                _mongodb_connect_attempted = True
+                mongodb_uri = get_mongodb_uri()
+                if not mongodb_uri:
+                    return None
+                
+                try:
+                    # PyMongo connects lazily; an unreachable server surfaces as
+                    # ServerSelectionTimeoutError on the first query instead of
+                    # a blocking ping here
+                    _mongodb_client = MongoClient(
+                        mongodb_uri,
+                        maxPoolSize=50,
+                        minPoolSize=5,
+                        maxIdleTimeMS=60000,
+                        serverSelectionTimeoutMS=3000,
+                        connectTimeoutMS=3000,
+                        socketTimeoutMS=10000,
+                        retryWrites=True,
+                        appname="shakeshack-agent",
+                    )
+                    logger.info("MongoDB client created")
+                except Exception as e:
+                    logger.error("MongoDB connection error: %s", e)
+                    _mongodb_client = None
     
     return _mongodb_client
 
 def get_db():
-    """Get the Shake Shack database."""
-    client = get_mongodb_client()
-    if client:
-        return client["shakeshack"]
-    return None
+    """Get the Shake Shack database handle, reused across calls."""
+    global _mongodb_db
+    if _mongodb_db is None:
+        client = get_mongodb_client()
+        if client is not None:
+            _mongodb_db = client["shakeshack"]
+    return _mongodb_db
+
+def get_menu_collection(db):
+    """Get the menu collection configured for read-only, secondary-preferred reads."""
+    return db.get_collection(
+        "menu_items",
+        read_preference=MENU_READ_PREFERENCE,
+        read_concern=MENU_READ_CONCERN,
+    )
 
 def close_connections():
     """Close all database connections."""
-    global _mongodb_client
+    global _mongodb_client, _mongodb_db, _mongodb_connect_attempted
+    _mongodb_connect_attempted = False
+    _mongodb_db = None
     if _mongodb_client:
         _mongodb_client.close()
         _mongodb_client = None
         logger.info("MongoDB connections closed")
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
+def ensure_indexes(db):
+    """
+    Create the menu indexes once per process.
+    
+    The (category, name) index serves the category filter; the query still
+    reads documents, since price and calories are not in the index. Each
+    index is created separately so existing duplicate names only cost the
+    unique one.
+    """
+    global _indexes_ensured
+    if _indexes_ensured:
+        return
+    _indexes_ensured = True
+    for keys, options in (
+        ([("category", pymongo.ASCENDING), ("name", pymongo.ASCENDING)], {}),
+        ([("name", pymongo.ASCENDING)], {"unique": True}),
+    ):
+        try:
+            db.menu_items.create_index(keys, **options)
+        except Exception as e:
+            logger.warning("Could not create menu index %s: %s", keys, e)
+
+def _freeze_menu(items):
+    """Wrap menu items read-only so the shared cached copy cannot be mutated."""
+    return tuple(MappingProxyType(item) for item in items)
+
+@st.cache_resource(ttl=3600)  # Cache for 1 hour; one read-only copy shared by all sessions
 def get_all_menu_items():
     """Retrieves all menu items with improved connection handling and caching."""
-    # Check if we have a cached version in session state
-    if "menu_cache" in st.session_state and st.session_state.menu_cache:
-        return st.session_state.menu_cache
-
     try:
         db = get_db()
         if db is not None:
-            all_items = list(db.menu_items.find({}, {"_id": 0}))
+            # Large first batch so the whole menu arrives in one round trip
+            # (the server default stops at 101 documents and needs a getMore)
+            all_items = list(get_menu_collection(db).find({}, MENU_PROJECTION, batch_size=MENU_BATCH_SIZE))
             if all_items:
-                # Cache the results
-                st.session_state.menu_cache = all_items
-                return all_items
+                # The server answered, so index creation won't stall on a timeout
+                ensure_indexes(db)
+                return _freeze_menu(all_items)
         
         # Fallback to hardcoded menu
         logger.info("Using fallback menu data (no DB connection or empty result)")
-        st.session_state.menu_cache = FALLBACK_MENU
-        return FALLBACK_MENU
+        return _freeze_menu(FALLBACK_MENU)
+    except ServerSelectionTimeoutError as e:
+        logger.error("MongoDB server unreachable, using fallback menu: %s", e)
+        return _freeze_menu(FALLBACK_MENU)
     except Exception as e:
-        logger.error(f"Error retrieving menu items: {e}")
-        st.session_state.menu_cache = FALLBACK_MENU
-        return FALLBACK_MENU
+        logger.error("Error retrieving menu items: %s", e)
+        return _freeze_menu(FALLBACK_MENU)
 
 def get_menu_by_category(category):
     """Retrieves menu items for a specific category."""
     try:
         db = get_db()
-        if db:
-            items = list(db.menu_items.find({"category": category}, {"_id": 0}))
+        if db is not None:
+            items = list(get_menu_collection(db).find({"category": category}, MENU_PROJECTION))
             if items:
                 return items
         
         # Fallback to filtered hardcoded menu
-        return [item for item in FALLBACK_MENU if item["category"] == category]
+        return list(_FALLBACK_BY_CATEGORY.get(category, ()))
     except Exception as e:
-        logger.error(f"Error retrieving menu items by category: {e}")
-        return [item for item in FALLBACK_MENU if item["category"] == category]
+        logger.error("Error retrieving menu items by category: %s", e)
+        return list(_FALLBACK_BY_CATEGORY.get(category, ()))
 
 def save_order(order_data):
     """Save an order to the database."""
     try:
         db = get_db()
-        if db:
+        if db is not None:
             result = db.orders.insert_one(order_data)
             return str(result.inserted_id)
         return None
     except Exception as e:
-        logger.error(f"Error saving order: {e}")
-        return None
\ No newline at end of file
+        logger.error("Error saving order: %s", e)
+        return None
+
+def save_orders(orders):
+    """Save several orders to the database in one round trip."""
+    try:
+        db = get_db()
+        if db is not None and orders:
+            # Unordered so one failed document does not stop the rest
+            result = db.orders.insert_many(orders, ordered=False)
+            return [str(i) for i in result.inserted_ids]
+        return []
+    except Exception as e:
+        logger.error("Error saving orders: %s", e)
+        return []
@@ -4,27 +4,80 @@ import re
 import random
 import functools
 import logging
+import threading
 import streamlit as st
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
-from langchain.memory import ConversationBufferMemory
-from menu import find_menu_item, display_formatted_menu, prepare_menu_info
-from order import update_order_quantity, remove_from_order, get_order_summary, add_to_order
-from database import get_all_menu_items
+from menu import find_menu_item, display_formatted_menu, prepare_menu_info, get_menu_index
+from order import update_order_quantity, remove_from_order, get_order_summary, add_many_to_order
 
 logger = logging.getLogger(__name__)
 
 # ——————————— Pre‑compiled Regex Patterns ———————————
+# Applied to lowercased messages only, so no IGNORECASE
 PREFIX_RE = re.compile(
-    r"^(?:(?:i(?:'|’)?d like(?: a)?|i would like|i want)|can i (?:get|have)|give me|may i have)\b",
-    re.IGNORECASE
+    r"^(?:(?:i(?:'|’)?d like(?: a)?|i would like|i want)|can i (?:get|have)|give me|may i have)\b"
 )
-QTY_RE = re.compile(r"^(\d+)\s+", re.IGNORECASE)
+# Keyword cues for routing unambiguous messages without the LLM
+CART_RE = re.compile(r"\b(?:cart|my order|order summary)\b")
+REMOVE_RE = re.compile(r"\b(?:remove|delete|take off|drop)\b")
+PRICE_RE = re.compile(r"\b(?:price|prices|cost|costs|how much)\b")
+ADD_RE = re.compile(r"^\d+\s|\badd\b")
+# Only clear imperative orders are placed without the LLM: "2 fries", "add a shake"
+ORDER_RE = re.compile(r"^(?:\d+\s|add\b)")
+# Questions ("can i get the fries gluten free?") are never treated as orders
+QUESTION_RE = re.compile(r"\?|\b(?:know|what|how|does|do|is|are|can|could|why|which)\b")
+# Negated requests ("don't add fries") always go to the LLM
+NEGATION_RE = re.compile(r"\b(?:not|no|never|without|dont|cant|wont|isnt|didnt)\b|\w+n['’]t\b")
+# Quantity changes and whole-order actions always go to the LLM, so
+# "cancel my order" is never answered with the cart summary
+LLM_ONLY_RE = re.compile(
+    r"\b(?:change|update|make it|instead|clear|empty|checkout|check out|cancel|place|submit|finish|confirm)\b"
+)
+# "menu" as a whole word, so words that merely contain it don't trigger the menu reply
+MENU_RE = re.compile(r"\bmenus?\b", re.IGNORECASE)
+
+# Full model for customer-facing answers, small fast model for routing/extraction
+CHAT_MODEL = "gpt-4"
+ROUTER_MODEL = "gpt-4o-mini"
+# Sampling temperature per model; routing must be deterministic to return stable JSON
+MODEL_TEMPERATURES = {CHAT_MODEL: 0.5, ROUTER_MODEL: 0}
+
+# Completed support answers kept for repeated questions, oldest evicted first
+RESPONSE_CACHE_SIZE = 256
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+# Phrases that mark a request for a recommendation, matched anywhere in
+# the message with one regex pass instead of one substring scan per phrase
+RECOMMEND_KEYWORDS = ("recommend", "suggest", "what should i", "best")
+RECOMMEND_RE = re.compile("|".join(map(re.escape, RECOMMEND_KEYWORDS)), re.IGNORECASE)
+
+
+def stream_content(chain, inputs, cache_key=None):
+    """
+    Yield the text of each streamed chunk, ending with an apology if the stream fails.
+    
+    When a cache_key is given, the full reply is stored in the response
+    cache once the stream completes; failed streams are never cached.
+    """
+    parts = []
+    try:
+        for chunk in chain.stream(inputs):
+            parts.append(chunk.content)
+            yield chunk.content
+    except Exception as e:
+        logger.error("Error streaming response: %s", e)
+        yield "I'm having trouble processing your request."
+        return
+    if cache_key is not None:
+        cache_response(cache_key, "".join(parts))
 
-# Dynamic item‑name matcher
-_menu_items = get_all_menu_items()
-_item_names = sorted([item["name"] for item in _menu_items], key=len, reverse=True)
-ITEM_RE = re.compile(r"\b(" + "|".join(map(re.escape, _item_names)) + r")\b", re.IGNORECASE)
+
+def cache_response(key, response):
+    """Store a completed reply, evicting the oldest entry when the cache is full."""
+    with _response_cache_lock:
+        if len(_response_cache) >= RESPONSE_CACHE_SIZE:
+            del _response_cache[next(iter(_response_cache))]
+        _response_cache[key] = response
 
 
 def llm_error_handler(default_return=None, error_message=None):
@@ -34,38 +87,56 @@ def llm_error_handler(default_return=None, error_message=None):
             try:
                 return func(*args, **kwargs)
             except Exception as e:
-                logger.error(f"Error in {func.__name__}: {e}")
+                logger.error("Error in %s: %s", func.__name__, e)
                 if error_message:
                     return error_message
-                if isinstance(default_return, str):
-                    return default_return
                 return default_return
         return wrapper
     return decorator
 
 
-def get_llm():
-    key = st.session_state.get("openai_api_key")
-    if key:
-        return ChatOpenAI(api_key=key, model_name="gpt-4", temperature=0.5)
-    env_key = os.getenv("OPENAI_API_KEY")
-    if env_key:
-        return ChatOpenAI(api_key=env_key, model_name="gpt-4", temperature=0.5)
-    return None
+@st.cache_resource(show_spinner=False)
+def get_http_client():
+    """One pooled HTTP client shared by every model client, so the router and chat models reuse the same TLS connections."""
+    import httpx
+    # The SDK's client keeps its default timeout and redirect settings; only the pool limits change
+    from openai import DefaultHttpxClient
+    return DefaultHttpxClient(limits=httpx.Limits(max_connections=50, max_keepalive_connections=10))
 
 
-def get_conversation_memory():
-    if "conversation_memory" not in st.session_state:
-        st.session_state.conversation_memory = ConversationBufferMemory(memory_key="chat_history")
-    return st.session_state.conversation_memory
+@st.cache_resource(show_spinner=False, max_entries=16, ttl=3600)
+def build_llm(api_key, model_name):
+    """Create one ChatOpenAI client per API key and model, all sharing one HTTP connection pool."""
+    # Imported here so startup and key-less sessions skip loading openai/httpx/pydantic
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        api_key=api_key,
+        model_name=model_name,
+        temperature=MODEL_TEMPERATURES.get(model_name, 0.5),
+        http_client=get_http_client(),
+    )
 
 
-@llm_error_handler(default_return="general_question")
-def classify_intent(user_message):
-    llm = get_llm()
-    if not llm:
-        return "general_question"
+def get_api_key():
+    return st.session_state.get("openai_api_key") or os.getenv("OPENAI_API_KEY")
+
+
+def get_llm(model_name=CHAT_MODEL):
+    key = get_api_key()
+    if key:
+        return build_llm(key, model_name)
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def router_prompt():
+    """Build the routing prompt once; its templates never change between calls."""
+    # Imported here so LangChain only loads once an LLM call is made
+    from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+    # Static instructions first and per-turn state after them, so the
+    # provider's prompt-prefix cache can reuse the unchanged prefix
     system = SystemMessagePromptTemplate.from_template("""
+        You route messages for a Shake Shack ordering assistant.
         Classify the user's message into ONE of:
         - cart_inquiry
         - order_placement
@@ -73,135 +144,294 @@ def classify_intent(user_message):
         - price_inquiry
         - remove_item
         - general_question
-        Return ONLY the intent label.
+        Also extract what that intent needs:
+        - order_placement / remove_item: "items", a list of objects with "name" and "quantity"
+        - quantity_update: "item_name" and the new "quantity"
+        - price_inquiry: "item_name" of the menu item asked about
+        Return ONLY JSON with the keys intent, items, item_name and quantity.
     """)
+    context = SystemMessagePromptTemplate.from_template("Current order: {current}")
     human = HumanMessagePromptTemplate.from_template("{input}")
-    chain = ChatPromptTemplate.from_messages([system, human]) | llm
-    return chain.invoke({"input": user_message}).content.strip().lower()
+    return ChatPromptTemplate.from_messages([system, context, human])
+
+
+@functools.lru_cache(maxsize=None)
+def support_prompt():
+    """Build the customer-support prompt once; its templates never change between calls."""
+    # Imported here so LangChain only loads once an LLM call is made
+    from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+    # Static instructions first and per-turn state after them, so the
+    # provider's prompt-prefix cache can reuse the unchanged prefix
+    system = SystemMessagePromptTemplate.from_template("""
+        You are a knowledgeable Shake Shack customer support agent.
+        Answer only Shake Shack-related questions about the menu, orders, prices, or recommendations, if not related, politely redirect to the customer to ask about one of those options.
+        If asked about store hours, locations, nutrition/allergens, catering, contact, or app/rewards,
+        provide the appropriate Shake Shack URL:
+        - Store hours & locations: https://www.shakeshack.com/locations/
+        - Allergies & nutrition: https://www.shakeshack.com/allergies-nutrition/
+        - Catering & large orders: https://www.shakeshack.com/catering/
+        - Customer service: https://www.shakeshack.com/contact-us/
+        - App & rewards program: https://www.shakeshack.com/app/
+        Menu Info:
+        {menu_info}
+    """)
+    # The menu only changes when it reloads, so it belongs to the cacheable
+    # prefix; the order changes every turn and goes last
+    context = SystemMessagePromptTemplate.from_template("Order: {order_str} | Total: ${total_price}")
+    human = HumanMessagePromptTemplate.from_template("{input}")
+    return ChatPromptTemplate.from_messages([system, context, human])
+
+
+@st.cache_resource(show_spinner=False, max_entries=32, ttl=3600)
+def build_chain(api_key, name):
+    """Compose a prompt with its model once per API key; the chains are immutable and shared."""
+    if name == "router":
+        # JSON mode guarantees a bare JSON object, with no code fences to strip
+        return router_prompt() | build_llm(api_key, ROUTER_MODEL).bind(response_format={"type": "json_object"})
+    return support_prompt() | build_llm(api_key, CHAT_MODEL)
+
+
+def get_chain(name):
+    key = get_api_key()
+    if key:
+        return build_chain(key, name)
+    return None
+
+
+def _to_int(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_route(route):
+    """
+    Coerce the router's JSON reply into the shapes the handlers expect.
+    
+    JSON mode guarantees valid JSON but not its schema, so a quantity of
+    "2" or an item without a name would otherwise fail later in a handler.
+    """
+    if not isinstance(route, dict):
+        route = {}
+    items = [
+        {"name": str(it["name"]), "quantity": _to_int(it.get("quantity"), 1)}
+        for it in route.get("items") or []
+        if isinstance(it, dict) and it.get("name")
+    ]
+    item_name = route.get("item_name")
+    return {
+        "intent": str(route.get("intent") or "general_question").strip().lower(),
+        "items": items,
+        "item_name": str(item_name) if item_name else None,
+        "quantity": _to_int(route.get("quantity"), None),
+    }
+
+
+@st.cache_data(ttl=600, max_entries=128, show_spinner=False)
+def route_message_cached(cache_key, current, _user_message, _chain):
+    """
+    Run the routing prompt for a message against the current order.
+    
+    Messages with the same cache key and order contents reuse the earlier
+    answer for 10 minutes instead of making another API round trip; the
+    least recently used of the 128 entries is dropped first. Underscored
+    arguments are not hashed; the key is the message with case and spacing
+    folded.
+    """
+    return normalize_route(json.loads(_chain.invoke({"current": current, "input": _user_message}).content))
+
+
+@llm_error_handler(default_return={"intent": "general_question"})
+def route_message(user_message):
+    """
+    Classify the message and extract the details its intent needs in one LLM call.
+    
+    Returns:
+        Dictionary with the intent label and, when relevant, the extracted
+        items, item_name and quantity
+    """
+    chain = get_chain("router")
+    if chain is None:
+        return {"intent": "general_question"}
+    # Errors propagate out of the cached call, so failures are never cached
+    current = ", ".join(sorted(i["name"] for i in st.session_state.order))
+    # Only case and spacing are folded; every word can change the route or
+    # the extracted items, and the cache is shared by all sessions
+    cache_key = " ".join(user_message.lower().split())
+    return route_message_cached(cache_key, current, user_message.strip(), chain)
+
+
+def fast_route(user_message):
+    """
+    Route clear-cut messages with keyword rules instead of an LLM call.
+    
+    Only handles cases the intent handlers can finish from the message text
+    alone, e.g. "remove the fries" or "how much is a ShackBurger".
+    
+    Returns:
+        Route dictionary with just the intent, or None when no single rule
+        clearly applies and the message should go to route_message
+    """
+    text = user_message.strip().lower()
+    if LLM_ONLY_RE.search(text) or NEGATION_RE.search(text):
+        return None
+    has_item = get_menu_index()["item_re"].search(text) is not None
+    cues = {
+        "cart_inquiry": not has_item and CART_RE.search(text) and not (REMOVE_RE.search(text) or ADD_RE.search(text)),
+        "remove_item": has_item and REMOVE_RE.search(text),
+        "price_inquiry": has_item and PRICE_RE.search(text),
+        "order_placement": has_item and ORDER_RE.search(text) and not QUESTION_RE.search(text),
+    }
+    matched = [intent for intent, hit in cues.items() if hit]
+    if len(matched) == 1:
+        return {"intent": matched[0]}
+    return None
 
 
 @llm_error_handler(default_return=[])
 def extract_order_items_from_text(user_message):
     raw = user_message.strip().lower()
     raw = PREFIX_RE.sub("", raw).strip()
-    items, seen = [], set()
-    for match in ITEM_RE.finditer(raw):
-        fragment = match.group(1)
-        mi = find_menu_item(fragment)
-        if mi and mi["name"] not in seen:
-            seen.add(mi["name"])
-            prefix = raw[:match.start()]
-            m = re.search(r"(\d+)\s*$", prefix)
-            qty = int(m.group(1)) if m else 1
-            items.append({"name": mi["name"], "quantity": qty})
+    menu_index = get_menu_index()
+    by_name = menu_index["by_name"]
+    items, index_by_name = [], {}
+    for match in menu_index["order_item_re"].finditer(raw):
+        # The message is lowercased and the matcher only matches whole menu
+        # names, so each hit is an exact key; no fuzzy lookup needed
+        mi = by_name.get(match["item"])
+        if mi:
+            qty = int(match["qty"]) if match["qty"] else 1
+            idx = index_by_name.get(mi["name"])
+            if idx is None:
+                index_by_name[mi["name"]] = len(items)
+                items.append({"name": mi["name"], "quantity": qty})
+            else:
+                # Repeated mentions of the same item add up
+                items[idx]["quantity"] += qty
     return items
 
 
-@llm_error_handler(default_return=[])
-def extract_order_items_using_llm(user_message):
-    llm = get_llm()
-    if not llm:
-        return []
-    system = SystemMessagePromptTemplate.from_template("""
-        You are a parser for Shake Shack orders.
-        Extract ALL menu items and quantities as JSON.
-    """)
-    human = HumanMessagePromptTemplate.from_template("{input}")
-    chain = ChatPromptTemplate.from_messages([system, human]) | llm
-    raw = chain.invoke({"input": user_message}).content
-    try:
-        data = json.loads(raw)
-        items, seen = [], set()
-        for it in data.get("items", []):
-            mi = find_menu_item(it.get("name", ""))
-            if mi and mi["name"] not in seen:
-                seen.add(mi["name"])
-                items.append({"name": mi["name"], "quantity": it.get("quantity", 1)})
-        return items
-    except:
-        return []
-
-
-def extract_order_items(user_message):
-    items = extract_order_items_from_text(user_message)
-    return items or extract_order_items_using_llm(user_message)
-
-
-@llm_error_handler(default_return=(False, None, None))
-def process_quantity_update(user_message):
-    llm = get_llm()
-    if not llm:
-        return False, None, None
-    current = ", ".join([i["name"] for i in st.session_state.order])
-    system = SystemMessagePromptTemplate.from_template(f"""
-        Current order: {current}
-        If updating quantity, return JSON with is_update, item_name, quantity.
-    """)
-    human = HumanMessagePromptTemplate.from_template("{input}")
-    chain = ChatPromptTemplate.from_messages([system, human]) | llm
-    raw = chain.invoke({"input": user_message}).content
-    try:
-        res = json.loads(raw)
-        return res.get("is_update", False), res.get("item_name"), res.get("quantity")
-    except:
-        return False, None, None
+def extract_route_items(route):
+    """Match the items extracted by route_message against the menu."""
+    items, index_by_name = [], {}
+    for it in route.get("items") or []:
+        mi = find_menu_item(it.get("name", ""))
+        if mi:
+            qty = it.get("quantity") or 1
+            idx = index_by_name.get(mi["name"])
+            if idx is None:
+                index_by_name[mi["name"]] = len(items)
+                items.append({"name": mi["name"], "quantity": qty})
+            else:
+                items[idx]["quantity"] += qty
+    return items
 
 
-@llm_error_handler(default_return=None)
-def extract_item_to_remove(user_message):
-    llm = get_llm()
-    if not llm:
-        return None
-    current = ", ".join([i["name"] for i in st.session_state.order])
-    system = SystemMessagePromptTemplate.from_template(f"""
-        Current order: {current}
-        Extract only the name of the item to remove.
-    """)
-    human = HumanMessagePromptTemplate.from_template("{input}")
-    chain = ChatPromptTemplate.from_messages([system, human]) | llm
-    return chain.invoke({"input": user_message}).content.strip()
+def extract_order_items(user_message, route):
+    items = extract_order_items_from_text(user_message)
+    return items or extract_route_items(route)
 
 
-@llm_error_handler(default_return=None)
-def extract_price_inquiry_item(user_message):
-    # direct lookup
-    for it in get_all_menu_items():
-        if it["name"].lower() in user_message.lower():
-            return it
-    llm = get_llm()
-    if not llm:
-        return None
-    system = SystemMessagePromptTemplate.from_template("""
-        Extract ONLY the name of the menu item being asked about for price inquiry.
-    """)
-    human = HumanMessagePromptTemplate.from_template("{input}")
-    chain = ChatPromptTemplate.from_messages([system, human]) | llm
-    name = chain.invoke({"input": user_message}).content.strip()
-    return find_menu_item(name)
+def extract_price_inquiry_item(user_message, route):
+    # direct lookup: one pass of the item-name matcher over the message
+    match = get_menu_index()["item_re"].search(user_message.lower())
+    if match:
+        return find_menu_item(match.group(1))
+    return find_menu_item(route.get("item_name"))
 
 
 @llm_error_handler(default_return="I'm having trouble processing your request.")
 def general_conversation(user_message, order_str, total_price, menu_info):
-    llm = get_llm()
-    if not llm:
+    chain = get_chain("support")
+    if chain is None:
         return "Please provide your API key."
-    system = SystemMessagePromptTemplate.from_template(f"""
-        You are a knowledgeable Shake Shack customer support agent.
-        Answer only Shake Shack-related questions about the menu, orders, prices, or recommendations, if not related, politely redirect to the customer to ask about one of those options.
-        If asked about store hours, locations, nutrition/allergens, catering, contact, or app/rewards,
-        provide the appropriate Shake Shack URL:
-        - Store hours & locations: https://www.shakeshack.com/locations/
-        - Allergies & nutrition: https://www.shakeshack.com/allergies-nutrition/
-        - Catering & large orders: https://www.shakeshack.com/catering/
-        - Customer service: https://www.shakeshack.com/contact-us/
-        - App & rewards program: https://www.shakeshack.com/app/
-        Order: {order_str} | Total: ${total_price:.2f}
-        Menu Info:
-        {menu_info}
-    """)
-    human = HumanMessagePromptTemplate.from_template("{input}")
-    chain = ChatPromptTemplate.from_messages([system, human]) | llm
-    return chain.invoke({"input": user_message}).content
+    # Repeated FAQ-style questions ("what are your hours?") against the same
+    # order and menu get the earlier answer without another API call
+    total_str = f"{total_price:.2f}"
+    cache_key = (" ".join(user_message.lower().split()), order_str, total_str, menu_info)
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    # Stream so the UI can render tokens as they arrive
+    return stream_content(chain, {
+        "order_str": order_str,
+        "total_price": total_str,
+        "menu_info": menu_info,
+        "input": user_message,
+    }, cache_key=cache_key)
+
+
+def handle_cart_inquiry(user_message, route):
+    return get_order_summary()
+
+
+def handle_quantity_update(user_message, route):
+    # Nothing to update, so skip matching the message against the order
+    if not st.session_state.order:
+        return "Your order is currently empty."
+    name, qty = route.get("item_name"), route.get("quantity")
+    if qty is not None:
+        if name:
+            return update_order_quantity(name, qty)
+        if len(st.session_state.order) == 1:
+            return update_order_quantity(st.session_state.order[0]["name"], qty)
+    return "I couldn't identify which item to update. Please specify."
+
+
+def handle_order_placement(user_message, route):
+    extracted = extract_order_items(user_message, route)
+    if extracted:
+        added = add_many_to_order([(find_menu_item(it["name"]), it["quantity"]) for it in extracted])
+        if added:
+            lines = "".join(f"- {q}x {mi['name']} — ${mi['price']*q:.2f}  \n" for mi, q in added)
+            return f"**Order Added Successfully**\n\nI've added:\n{lines}\n**Total: ${st.session_state.total_price:.2f}**"
+    return "I couldn't identify any items to add. Please use exact menu names."
+
+
+def handle_price_inquiry(user_message, route):
+    pi = extract_price_inquiry_item(user_message, route)
+    if pi:
+        return f"{pi['name']} costs ${pi['price']:.2f}, {pi['calories']} cal."
+    return "Which item price would you like to know?"
+
+
+def handle_remove_item(user_message, route):
+    # Nothing to remove, so skip extracting items from the message
+    if not st.session_state.order:
+        return "Your order is currently empty."
+    items_to_remove = extract_order_items(user_message, route)
+    responses = []
+    for it in items_to_remove:
+        name, qty = it["name"], it["quantity"]
+        current = st.session_state.order_index.get(name.lower())
+        if current:
+            if qty < current["quantity"]:
+                new_qty = current["quantity"] - qty
+                responses.append(update_order_quantity(name, new_qty))
+            else:
+                responses.append(remove_from_order(name))
+    return "\n\n".join(responses) if responses else "I couldn't find those items in your order."
+
+
+def handle_general_question(user_message, route):
+    order_items = [
+        f"{i.get('quantity',1)}x {i['name']}" if i.get('quantity',1)>1 else i['name']
+        for i in st.session_state.order
+    ]
+    order_str = ", ".join(order_items) if order_items else "None"
+    menu_info = prepare_menu_info()
+    return general_conversation(user_message, order_str, st.session_state.total_price, menu_info)
+
+
+# Intent label -> handler; anything unrecognized falls back to general conversation
+INTENT_HANDLERS = {
+    "cart_inquiry": handle_cart_inquiry,
+    "quantity_update": handle_quantity_update,
+    "order_placement": handle_order_placement,
+    "price_inquiry": handle_price_inquiry,
+    "remove_item": handle_remove_item,
+}
 
 
 @llm_error_handler(default_return="I'm having trouble processing your request.", error_message="Connection issue.")
@@ -209,15 +439,18 @@ def process_message(user_message):
     llm = get_llm()
     if not llm:
         return "Please provide your OpenAI API key."
-    if "menu" in user_message.lower():
+    if MENU_RE.search(user_message):
         return display_formatted_menu()
 
-    user_lower = user_message.lower()
     # Recommendation requests
-    if any(kw in user_lower for kw in ("recommend", "suggest", "what should i", "best")):
-        items = get_all_menu_items()
-        burgers = [i for i in items if i["category"].lower() == "burgers"]
-        chicken = [i for i in items if "chicken" in i["name"].lower()]
+    if RECOMMEND_RE.search(user_message):
+        menu_index = get_menu_index()
+        items = menu_index["items"]
+        # Items are grouped by category once per menu load; only the few
+        # category names are compared here, not every item
+        burgers = [item for category, group in menu_index["by_category"].items()
+                   if category.lower() == "burgers" for item in group]
+        chicken = [items[i] for i, name in enumerate(menu_index["names_lower"]) if "chicken" in name]
         choices = []
         if chicken:
             choices.append(random.choice(chicken))
@@ -226,65 +459,11 @@ def process_message(user_message):
         rec = random.choice(choices) if choices else random.choice(items)
         return f"I'd recommend our **{rec['name']}** — ${rec['price']:.2f}, about {rec['calories']} cal."
 
-    # Intent-based handling
-    intent = classify_intent(user_message)
-    logger.info(f"Intent: {intent}")
-
-    if intent == "cart_inquiry":
-        return get_order_summary()
-
-    if intent == "quantity_update":
-        is_upd, name, qty = process_quantity_update(user_message)
-        if is_upd and qty is not None:
-            if name:
-                return update_order_quantity(name, qty)
-            if len(st.session_state.order) == 1:
-                return update_order_quantity(st.session_state.order[0]["name"], qty)
-        return "I couldn't identify which item to update. Please specify."
-
-    if intent == "order_placement":
-        extracted = extract_order_items(user_message)
-        if extracted:
-            added = []
-            for it in extracted:
-                mi = find_menu_item(it["name"])
-                if mi:
-                    add_to_order(mi, it["quantity"])
-                    added.append((mi, it["quantity"]))
-            if added:
-                st.session_state.update_sidebar = True
-                resp = "**Order Added Successfully**\n\nI've added:\n"
-                for mi, q in added:
-                    resp += f"- {q}x {mi['name']} — ${mi['price']*q:.2f}  \n"
-                resp += f"\n**Total: ${st.session_state.total_price:.2f}**"
-                return resp
-        return "I couldn't identify any items to add. Please use exact menu names."
-
-    if intent == "price_inquiry":
-        pi = extract_price_inquiry_item(user_message)
-        if pi:
-            return f"{pi['name']} costs ${pi['price']:.2f}, {pi['calories']} cal."
-        return "Which item price would you like to know?"
-
-    if intent == "remove_item":
-        items_to_remove = extract_order_items(user_message)
-        responses = []
-        for it in items_to_remove:
-            name, qty = it["name"], it["quantity"]
-            current = next((i for i in st.session_state.order if i["name"] == name), None)
-            if current:
-                if qty < current["quantity"]:
-                    new_qty = current["quantity"] - qty
-                    responses.append(update_order_quantity(name, new_qty))
-                else:
-                    responses.append(remove_from_order(name))
-        return "\n\n".join(responses) if responses else "I couldn't find those items in your order."
-
-    # Fallback to general conversation
-    order_items = [
-        f"{i.get('quantity',1)}x {i['name']}" if i.get('quantity',1)>1 else i['name']
-        for i in st.session_state.order
-    ]
-    order_str = ", ".join(order_items) if order_items else "None"
-    menu_info = prepare_menu_info()
-    return general_conversation(user_message, order_str, st.session_state.total_price, menu_info)
+    # Intent-based handling: keyword rules settle clear-cut messages, otherwise
+    # one LLM call yields the intent and its details
+    route = fast_route(user_message) or route_message(user_message)
+    intent = route["intent"]
+    logger.info("Intent: %s", intent)
+
+    handler = INTENT_HANDLERS.get(intent, handle_general_question)
+    return handler(user_message, route)
@@ -1,8 +1,100 @@
+import re
 import logging
+import threading
+import streamlit as st
 from database import get_all_menu_items
 
 logger = logging.getLogger(__name__)
 
+# Resolved lookups kept per menu load by find_menu_item, oldest evicted first
+LOOKUP_CACHE_SIZE = 256
+# Script runs share the cached menu index across threads
+_lookup_cache_lock = threading.Lock()
+
+def _trie_pattern(names):
+    """
+    Build a regex alternation over names, factored as a character trie.
+    
+    "Chocolate Shake|Cheeseburger" becomes "C(?:heeseburger|hocolate Shake)",
+    so the regex engine rejects a position after one character comparison
+    instead of retrying every name there. Optional suffixes are greedy, so
+    the longest name matching at a position still wins.
+    """
+    trie = {}
+    for name in names:
+        node = trie
+        for ch in name.lower():
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + body + ")?" if "" in node else body
+    
+    return build(trie)
+
+@st.cache_resource(ttl=3600)  # Rebuilt on the same schedule as the menu cache
+def get_menu_index():
+    """
+    Build lookup structures over the menu once per menu load.
+    
+    Scanned fields are kept as parallel tuples aligned with the item list,
+    so name scans never touch the full item dicts.
+    
+    Returns:
+        Dictionary with the menu items, their lowercase names and word
+        sets, a lowercase name -> item map, a word -> item
+        indices map, the items grouped by category, the compiled
+        item-name matchers (for lowercase text), the menu text for prompts,
+        the Markdown menu for display and a cache of fuzzy lookups
+    """
+    items = get_all_menu_items()
+    names_lower = tuple(item["name"].lower() for item in items)
+    by_name = {}
+    for name, item in zip(names_lower, items):
+        by_name.setdefault(name, item)
+    name_words = tuple(frozenset(name.split()) for name in names_lower)
+    word_index = {}
+    for i, words in enumerate(name_words):
+        for word in words:
+            word_index.setdefault(word, []).append(i)
+    by_category = {}
+    for item in items:
+        by_category.setdefault(item["category"], []).append(item)
+    
+    # One alternation over every item name, so a single regex pass finds all
+    # names in a message; the longest name wins, so "Bacon Cheeseburger"
+    # beats "Cheeseburger"
+    item_alternation = _trie_pattern(by_name)
+    # The trie is built from lowercase names and callers match lowercased
+    # text, so the patterns skip IGNORECASE and its per-character case folding
+    item_re = re.compile(r"\b(" + item_alternation + r")\b")
+    # Item name with an optional quantity directly before it ("2 fries")
+    order_item_re = re.compile(r"(?:(?P<qty>\d+)\s*)?\b(?P<item>" + item_alternation + r")\b")
+    
+    return {
+        "items": items,
+        "names_lower": names_lower,
+        "name_words": name_words,
+        "by_name": by_name,
+        "word_index": word_index,
+        "by_category": by_category,
+        "item_re": item_re,
+        "order_item_re": order_item_re,
+        "menu_info": _format_menu_info(by_category),
+        "formatted_menu": _format_menu_display(by_category),
+        # Filled by find_menu_item; lives and expires with this menu load
+        "lookup_cache": {},
+    }
+
+def invalidate_menu_cache():
+    """Drop the cached menu and everything derived from it, e.g. after a menu edit."""
+    get_all_menu_items.clear()
+    get_menu_index.clear()
+
 def find_menu_item(item_name, threshold=20):
     """
     Find a menu item by name using improved fuzzy matching.
@@ -18,90 +110,122 @@ def find_menu_item(item_name, threshold=20):
         return None
     
     item_name = item_name.lower().strip()
-    all_items = get_all_menu_items()
+    menu_index = get_menu_index()
     
     # Early return for exact matches
-    for item in all_items:
-        if item["name"].lower() == item_name:
-            return item
+    exact_match = menu_index["by_name"].get(item_name)
+    if exact_match:
+        return exact_match
+    
+    # The same names and phrasings recur every turn; reuse earlier results
+    # (misses included) until the menu reloads
+    lookup_cache = menu_index["lookup_cache"]
+    key = (item_name, threshold)
+    with _lookup_cache_lock:
+        if key in lookup_cache:
+            return lookup_cache[key]
+    
+    best_match = _fuzzy_match(menu_index, item_name, threshold)
+    with _lookup_cache_lock:
+        if len(lookup_cache) >= LOOKUP_CACHE_SIZE:
+            del lookup_cache[next(iter(lookup_cache))]
+        lookup_cache[key] = best_match
+    return best_match
+
+def _fuzzy_match(menu_index, item_name, threshold):
+    """Score menu items against a lowercase name; phrase matches before word matches."""
+    all_items = menu_index["items"]
+    names_lower = menu_index["names_lower"]
     
     # Initialize best match tracking
     best_match = None
     best_score = threshold
     
-    # Check all menu items with improved scoring
-    for item in all_items:
-        item_lower = item["name"].lower()
-        score = 0
-        
+    # Phrase matching always outscores word matching, so try it first
+    for i, item_lower in enumerate(names_lower):
         # 1. Contains entire phrase
         if item_name in item_lower:
             score = 80
-        
         # 2. Item name contains the search term
         elif item_lower in item_name:
             score = 70
+        else:
+            continue
+        
+        if score > best_score:
+            best_match = all_items[i]
+            best_score = score
+            # Later items can only tie the top phrase score, never beat it
+            if score == 80:
+                break
+    
+    if best_match:
+        return best_match
+    
+    # 3. Word-by-word matching, limited to items sharing at least one word
+    name_words = set(item_name.split())
+    candidates = set()
+    for word in name_words:
+        candidates.update(menu_index["word_index"].get(word, ()))
+    
+    # Visit candidates in menu order so ties resolve as before
+    for i in sorted(candidates):
+        item_words = menu_index["name_words"][i]
+        common_words = item_words.intersection(name_words)
         
-        # 3. Word-by-word matching
+        # If all words in search match
+        if common_words == name_words:
+            score = 60
+        # If all words in item match
+        elif common_words == item_words:
+            score = 50
+        # Partial word matching
         else:
-            item_words = set(item_lower.split())
-            name_words = set(item_name.split())
-            common_words = item_words.intersection(name_words)
-            
-            # If all words in search match
-            if common_words == name_words:
-                score = 60
-            # If all words in item match
-            elif common_words == item_words:
-                score = 50
-            # Partial word matching
-            elif common_words:
-                # Score based on percentage of matching words
-                score = 40 * len(common_words) / max(len(item_words), len(name_words))
+            # Score based on percentage of matching words
+            score = 40 * len(common_words) / max(len(item_words), len(name_words))
         
         # Update best match if score is higher
         if score > best_score:
-            best_match = item
+            best_match = all_items[i]
             best_score = score
     
     return best_match
 
+def _format_menu_info(menu_by_category):
+    """Format the menu grouped by category as plain text for prompts."""
+    parts = ["Shake Shack Menu Information:\n"]
+    for category, items in menu_by_category.items():
+        parts.append(f"\n{category}:\n")
+        for item in items:
+            parts.append(f"- {item['name']}: ${item['price']:.2f}, {item['calories']} calories\n")
+    
+    return "".join(parts)
+
 def prepare_menu_info():
-    """Prepare formatted menu information for prompts."""
-    menu_items = get_all_menu_items()
-    menu_by_category = {}
-    for item in menu_items:
-        category = item["category"]
-        if category not in menu_by_category:
-            menu_by_category[category] = []
-        menu_by_category[category].append(item)
-    
-    menu_info = "Shake Shack Menu Information:\n"
+    """
+    Prepare formatted menu information for prompts.
+    
+    The text is built once per menu load alongside the menu index, so every
+    turn gets the same shared string (and the same prompt prefix) until the
+    menu refreshes.
+    """
+    return get_menu_index()["menu_info"]
+
+def _format_menu_display(menu_by_category):
+    """Format the menu grouped by category as Markdown for the chat."""
+    parts = ["# Shake Shack Menu\n\n"]
     for category, items in menu_by_category.items():
-        menu_info += f"\n{category}:\n"
+        parts.append(f"## {category}\n\n")
         for item in items:
-            menu_info += f"- {item['name']}: ${item['price']:.2f}, {item['calories']} calories\n"
+            parts.append(f"- **{item['name']}** — ${item['price']:.2f} ({item['calories']} calories)\n")
+        parts.append("\n")
     
-    return menu_info
+    return "".join(parts)
 
 def display_formatted_menu():
     """
     Returns a nicely formatted menu for display to the user.
     This is separate from prepare_menu_info which is for LLM prompts.
+    The Markdown is built once per menu load alongside the menu index.
     """
-    menu_items = get_all_menu_items()
-    menu_by_category = {}
-    for item in menu_items:
-        category = item["category"]
-        if category not in menu_by_category:
-            menu_by_category[category] = []
-        menu_by_category[category].append(item)
-    
-    formatted_menu = "# Shake Shack Menu\n\n"
-    for category, items in menu_by_category.items():
-        formatted_menu += f"## {category}\n\n"
-        for item in items:
-            formatted_menu += f"- **{item['name']}** — ${item['price']:.2f} ({item['calories']} calories)\n"
-        formatted_menu += "\n"
-    
-    return formatted_menu
\ No newline at end of file
+    return get_menu_index()["formatted_menu"]
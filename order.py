@@ -13,8 +13,68 @@ def initialize_order_state():
     if 'total_price' not in st.session_state:
         st.session_state.total_price = 0.0
     
-    if 'update_sidebar' not in st.session_state:
-        st.session_state.update_sidebar = False
+    if 'order_index' not in st.session_state:
+        st.session_state.order_index = {item["name"].lower(): item for item in st.session_state.order}
+    
+    if 'order_lines' not in st.session_state:
+        _refresh_summary()
+
+def _recompute_total():
+    """
+    Set total_price from the order lines.
+    
+    Summed in integer cents, so repeated adds and removals never
+    accumulate float drift (6.99 + 5.99 - 5.99 is exactly 6.99 again).
+    """
+    total_cents = sum(round(item["price"] * 100) * item.get("quantity", 1) for item in st.session_state.order)
+    st.session_state.total_price = total_cents / 100
+
+def _refresh_summary():
+    """
+    Recompute the total and re-format the order lines and summary after
+    the order changes.
+    
+    Streamlit reruns the whole script on every interaction, so the sidebar
+    and summary read these cached strings instead of re-formatting every
+    item on each rerun.
+    """
+    _recompute_total()
+    lines = []
+    for item in st.session_state.order:
+        quantity = item.get("quantity", 1)
+        quantity_str = f"({quantity}x) " if quantity > 1 else ""
+        lines.append(f"- {quantity_str}{item['name']} — ${item['price'] * quantity:.2f}")
+    st.session_state.order_lines = lines
+    
+    if not lines:
+        st.session_state.order_summary = "Your order is currently empty."
+        return
+    st.session_state.order_summary = "".join([
+        "**Your current order:**  \n",
+        *(f"{line}  \n" for line in lines),
+        f"  \n**Total: ${st.session_state.total_price:.2f}**",
+    ])
+
+def get_order_lines():
+    """Formatted "- (2x) Item — $price" lines for the current order."""
+    return st.session_state.order_lines
+
+def _new_order_item(menu_item, quantity):
+    """Append a new line to the order and register it in the name index."""
+    item = {
+        "name": menu_item["name"],
+        "price": menu_item["price"],
+        "category": menu_item["category"],
+        "quantity": quantity
+    }
+    st.session_state.order.append(item)
+    st.session_state.order_index[menu_item["name"].lower()] = item
+    return item
+
+def _drop_order_item(item):
+    """Remove a line from the order and from the name index."""
+    st.session_state.order.remove(item)
+    del st.session_state.order_index[item["name"].lower()]
 
 def add_to_order(menu_item, quantity=1):
     """
@@ -31,29 +91,63 @@ def add_to_order(menu_item, quantity=1):
         return False
     
     # Check if this item is already in the order
-    for i, item in enumerate(st.session_state.order):
-        if item["name"].lower() == menu_item["name"].lower():
-            # Update the quantity instead of adding a new item
-            old_quantity = item.get("quantity", 1)
-            new_quantity = old_quantity + quantity
-            st.session_state.order[i]["quantity"] = new_quantity
-            st.session_state.total_price += menu_item["price"] * quantity
-            st.session_state.update_sidebar = True
-            return True
+    item = st.session_state.order_index.get(menu_item["name"].lower())
+    if item:
+        # Update the quantity instead of adding a new item
+        item["quantity"] = item.get("quantity", 1) + quantity
+    else:
+        # Item not in order, add it as new
+        _new_order_item(menu_item, quantity)
+    _refresh_summary()
+    
+    return True
+
+def add_many_to_order(items):
+    """
+    Adds several items to the order with a single total and summary update.
+    
+    Args:
+        items: List of (menu_item, quantity) tuples
         
-    # Item not in order, add it as new
-    st.session_state.order.append({
-        "name": menu_item["name"],
-        "price": menu_item["price"],
-        "category": menu_item["category"],
-        "quantity": quantity
-    })
-    st.session_state.total_price += menu_item["price"] * quantity
+    Returns:
+        List of the (menu_item, quantity) tuples that were added
+    """
+    order_index = st.session_state.order_index
+    added = []
     
-    # Set flag to update the sidebar
-    st.session_state.update_sidebar = True
+    for menu_item, quantity in items:
+        if not menu_item:
+            continue
+        existing = order_index.get(menu_item["name"].lower())
+        if existing:
+            # Update the quantity instead of adding a new item
+            existing["quantity"] = existing.get("quantity", 1) + quantity
+        else:
+            _new_order_item(menu_item, quantity)
+        added.append((menu_item, quantity))
     
-    return True
+    _refresh_summary()
+    return added
+
+def find_order_item(item_name):
+    """
+    Finds an item in the current order.
+    
+    An exact (case-insensitive) name match is a single index lookup and
+    wins over a partial one, so "Cheeseburger" is not mistaken for an
+    earlier "Bacon Cheeseburger".
+    
+    Args:
+        item_name: Name of the item to look for
+        
+    Returns:
+        The order line dictionary, or None if not found
+    """
+    name_lower = item_name.lower()
+    order_index = st.session_state.order_index
+    if name_lower in order_index:
+        return order_index[name_lower]
+    return next((item for key, item in order_index.items() if name_lower in key), None)
 
 def update_order_quantity(item_name, new_quantity):
     """
@@ -66,31 +160,21 @@ def update_order_quantity(item_name, new_quantity):
     Returns:
         Response message confirming the update
     """
-    for i, item in enumerate(st.session_state.order):
-        if item_name.lower() in item["name"].lower():
-            # Store old quantity for price adjustment
-            old_quantity = item.get("quantity", 1)
-            
-            # Calculate price difference
-            price_change = item["price"] * (new_quantity - old_quantity)
-            
-            # Update quantity or remove if quantity is zero
-            if new_quantity <= 0:
-                removed_item = st.session_state.order.pop(i)
-                st.session_state.total_price -= removed_item["price"] * old_quantity
-                response = f"**I've removed {removed_item['name']} from your order.**  \n  \n**Your total is now ${st.session_state.total_price:.2f}**"
-            else:
-                st.session_state.order[i]["quantity"] = new_quantity
-                st.session_state.total_price += price_change
-                item_name = st.session_state.order[i]["name"]
-                response = f"**I've updated your order:**  \n- Now {new_quantity}x {item_name} — ${item['price'] * new_quantity:.2f}  \n  \n**Your total is now ${st.session_state.total_price:.2f}**"
-            
-            # Set flag to update the sidebar
-            st.session_state.update_sidebar = True
-            
-            return response
-            
-    return f"I couldn't find '{item_name}' in your current order."
+    item = find_order_item(item_name)
+    if item is None:
+        return f"I couldn't find '{item_name}' in your current order."
+    
+    # Update quantity or remove if quantity is zero
+    if new_quantity <= 0:
+        _drop_order_item(item)
+        _refresh_summary()
+        response = f"**I've removed {item['name']} from your order.**  \n  \n**Your total is now ${st.session_state.total_price:.2f}**"
+    else:
+        item["quantity"] = new_quantity
+        _refresh_summary()
+        response = f"**I've updated your order:**  \n- Now {new_quantity}x {item['name']} — ${item['price'] * new_quantity:.2f}  \n  \n**Your total is now ${st.session_state.total_price:.2f}**"
+    
+    return response
 
 def remove_from_order(item_name):
     """
@@ -102,16 +186,16 @@ def remove_from_order(item_name):
     Returns:
         Response message confirming the removal
     """
-    for i, item in enumerate(st.session_state.order):
-        if item_name.lower() in item["name"].lower():
-            removed_item = st.session_state.order.pop(i)
-            quantity = removed_item.get("quantity", 1)
-            st.session_state.total_price -= removed_item["price"] * quantity
-            quantity_text = f"{quantity}x " if quantity > 1 else ""
-            response = f"**Removed from your order:**  \n- {quantity_text}{removed_item['name']}  \n  \n**Your total is now ${st.session_state.total_price:.2f}**"
-            st.session_state.update_sidebar = True
-            return response
-    return f"I couldn't find '{item_name}' in your current order."
+    removed_item = find_order_item(item_name)
+    if removed_item is None:
+        return f"I couldn't find '{item_name}' in your current order."
+    
+    _drop_order_item(removed_item)
+    quantity = removed_item.get("quantity", 1)
+    _refresh_summary()
+    quantity_text = f"{quantity}x " if quantity > 1 else ""
+    response = f"**Removed from your order:**  \n- {quantity_text}{removed_item['name']}  \n  \n**Your total is now ${st.session_state.total_price:.2f}**"
+    return response
 
 def get_order_summary():
     """
@@ -120,22 +204,13 @@ def get_order_summary():
     Returns:
         Formatted order summary string
     """
-    if not st.session_state.order:
-        return "Your order is currently empty."
-
-    order_summary = "**Your current order:**  \n"
-    for item in st.session_state.order:
-        quantity = item.get("quantity", 1)
-        quantity_str = f"({quantity}x) " if quantity > 1 else ""
-        order_summary += f"- {quantity_str}{item['name']} — ${item['price'] * quantity:.2f}  \n"
-    order_summary += f"  \n**Total: ${st.session_state.total_price:.2f}**"
-    return order_summary
+    return st.session_state.order_summary
 
 def clear_order():
     """Clear the current order."""
     st.session_state.order = []
-    st.session_state.total_price = 0.0
-    st.session_state.update_sidebar = True
+    st.session_state.order_index = {}
+    _refresh_summary()
     return "Your order has been cleared."
 
 def finalize_order():
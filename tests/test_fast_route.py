@@ -0,0 +1,61 @@
+import re
+
+import pytest
+
+import llm
+from menu import _trie_pattern
+
+MENU_NAMES = ["shackburger", "smokeshack", "hamburger", "fries", "chocolate shake", "vanilla shake"]
+
+
+@pytest.fixture(autouse=True)
+def menu_index(monkeypatch):
+    item_re = re.compile(r"\b(" + _trie_pattern(MENU_NAMES) + r")\b")
+    monkeypatch.setattr(llm, "get_menu_index", lambda: {"item_re": item_re})
+
+
+@pytest.mark.parametrize("message", [
+    "I want to know how many calories are in a ShackBurger",
+    "I would like to know if the SmokeShack is spicy",
+    "Can I get the fries gluten free?",
+    "Give me the ingredients of the chocolate shake",
+    "Do you add cheese to the hamburger?",
+    "don't add fries",
+    "add 2 fries?",
+    "we cant have the fries",
+    "I won’t need the hamburger, add a shake",
+])
+def test_questions_and_negations_are_not_orders(message):
+    assert llm.fast_route(message) is None
+
+
+@pytest.mark.parametrize("message", [
+    "2 fries please",
+    "add a vanilla shake",
+    "Add 2 ShackBurger",
+])
+def test_imperative_orders_are_fast_routed(message):
+    assert llm.fast_route(message) == {"intent": "order_placement"}
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("remove the fries", "remove_item"),
+    ("how much is a shackburger", "price_inquiry"),
+    ("what is in my cart?", "cart_inquiry"),
+    ("what's in my order", "cart_inquiry"),
+    ("show my order", "cart_inquiry"),
+    ("i want to remove the fries", "remove_item"),
+    ("what does the smokeshack cost at this restaurant", "price_inquiry"),
+])
+def test_other_cues_still_match(message, intent):
+    assert llm.fast_route(message) == {"intent": intent}
+
+
+@pytest.mark.parametrize("message", [
+    "cancel my order",
+    "submit my order",
+    "place my order",
+    "confirm my order",
+])
+def test_order_actions_go_to_the_router(message):
+    assert llm.fast_route(message) is None
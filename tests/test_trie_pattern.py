@@ -0,0 +1,40 @@
+import itertools
+import re
+
+import pytest
+
+from database import FALLBACK_MENU
+from menu import _trie_pattern
+
+MENU_NAMES = [item["name"].lower() for item in FALLBACK_MENU]
+# Names sharing prefixes with each other and with the menu, so the trie has
+# to fall back from a longer optional suffix to a shorter name
+SHARED_PREFIX_NAMES = MENU_NAMES + ["fries deluxe", "shack", "shack sauce", "cheese", "bacon"]
+
+
+def flat_pattern(names):
+    """The longest-first alternation the trie replaced."""
+    return "|".join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+
+
+def messages(names):
+    words = ["", "2", "add", "no", "s", "es", "deluxes", "sauce", "burger"]
+    for name in names:
+        for before, after in itertools.product(words, repeat=2):
+            yield " ".join(part for part in (before, name, after) if part)
+            yield f"{before}{name}{after}"
+
+
+@pytest.mark.parametrize("names", [MENU_NAMES, SHARED_PREFIX_NAMES], ids=["menu", "shared-prefix"])
+@pytest.mark.parametrize("template", [r"\b({})\b", r"(?:(?P<qty>\d+)\s*)?\b(?P<item>{})\b"], ids=["item_re", "order_item_re"])
+def test_trie_matches_flat_alternation(names, template):
+    trie_re = re.compile(template.format(_trie_pattern(names)))
+    flat_re = re.compile(template.format(flat_pattern(names)))
+    for message in messages(names):
+        assert [m.group(0) for m in trie_re.finditer(message)] == [m.group(0) for m in flat_re.finditer(message)], message
+
+
+def test_longer_name_backtracks_at_word_boundary():
+    item_re = re.compile(r"\b(" + _trie_pattern(["fries", "fries deluxe"]) + r")\b")
+    assert item_re.search("fries deluxes").group(1) == "fries"
+    assert item_re.search("fries deluxe please").group(1) == "fries deluxe"
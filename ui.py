@@ -1,11 +1,15 @@
 import streamlit as st
 import os
 import logging
-from langchain_community.chat_message_histories import StreamlitChatMessageHistory
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Number of chat messages kept in session state and re-rendered on each run
+MAX_CHAT_HISTORY = 50
+# Chat roles for LangChain message types
+CHAT_ROLES = {"human": "user", "ai": "assistant"}
+
 # UI Initialization
 def initialize_ui():
     """Initialize the UI components and styles."""
@@ -20,10 +24,7 @@ def initialize_ui():
 
 # Sidebar Components
 def setup_sidebar():
-    """Set up the sidebar with API key input and order summary."""
-    # Import here to avoid circular imports
-    from order import clear_order
-    
+    """Set up the sidebar with API key input."""
     # --- Sidebar: API Key Input ---
     st.sidebar.header("OpenAI API Key")
     
@@ -37,33 +38,46 @@ def setup_sidebar():
     api_key_input = st.sidebar.text_input(api_key_label, type="password")
     if api_key_input:
         st.session_state.openai_api_key = api_key_input
-        
+
+@st.fragment
+def render_order_summary():
+    """
+    Render the order summary; called inside the sidebar container.
+    
+    Called after the chat input is handled so the summary already reflects
+    any order changes from this run, without a second script rerun. As a
+    fragment, clearing the order reruns only this summary, not the chat.
+    """
+    # Import here to avoid circular imports
+    from order import clear_order, get_order_lines
+    
     # --- Sidebar: Order Summary ---
-    st.sidebar.title("Order Summary")
+    st.title("Order Summary")
     if st.session_state.order:
-        # Display order items
-        for item in st.session_state.order:
-            quantity = item.get("quantity", 1)
-            quantity_str = f"({quantity}x) " if quantity > 1 else ""
-            st.sidebar.write(f"- {quantity_str}{item['name']} — ${item['price'] * quantity:.2f}")
+        # Display order items, formatted when the order last changed
+        for line in get_order_lines():
+            st.write(line)
         
         # Display total and clear button
-        st.sidebar.write(f"**Total: ${st.session_state.total_price:.2f}**")
+        st.write(f"**Total: ${st.session_state.total_price:.2f}**")
         
         # Add checkout button
-        col1, col2 = st.sidebar.columns(2)
+        col1, col2 = st.columns(2)
         with col1:
             if st.button("Clear Order"):
                 clear_order()
-                st.rerun()
+                st.rerun(scope="fragment")
         with col2:
             if st.button("Checkout"):
                 from order import finalize_order
                 result = finalize_order()
-                st.session_state.last_response = result
+                # Record the confirmation in the chat; a full rerun renders it
+                msgs = get_chat_history()
+                msgs.add_ai_message(result)
+                trim_langchain_history(msgs)
                 st.rerun()
     else:
-        st.sidebar.write("Your order is empty.")
+        st.write("Your order is empty.")
 
 # Main Content Components
 def setup_main_content():
@@ -82,64 +96,40 @@ def setup_main_content():
         st.warning("⚠️ Please enter your OpenAI API key in the sidebar to use the chat functionality.")
 
 # Chat History Management
+def get_chat_history():
+    """Get the session's LangChain message history, created once per session."""
+    if "chat_messages" not in st.session_state:
+        # Imported here so the page starts rendering before LangChain loads
+        from langchain_community.chat_message_histories import StreamlitChatMessageHistory
+        st.session_state.chat_messages = StreamlitChatMessageHistory(key="langchain_messages")
+    return st.session_state.chat_messages
+
 def initialize_chat_history():
-    """Initialize and synchronize chat history."""
-    # Initialize chat history if not already done
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
-        
-    # Initialize last_response if not already done
-    if "last_response" not in st.session_state:
-        st.session_state.last_response = None
-        
+    """
+    Initialize the chat history.
+    
+    The LangChain message history is the only copy of the conversation;
+    it is rendered directly, so there is no second list to keep in sync.
+    """
     # Initialize chat message history for LangChain integration
-    msgs = StreamlitChatMessageHistory(key="langchain_messages")
-    
-    # If our session state is empty but LangChain history exists, sync them
-    if not st.session_state.chat_history and msgs.messages:
-        for msg in msgs.messages:
-            st.session_state.chat_history.append({
-                "role": "user" if msg.type == "human" else "assistant",
-                "content": msg.content
-            })
-    
-    # If we have a welcome message in session state but not in LangChain history
-    elif st.session_state.chat_history and not msgs.messages:
-        for msg in st.session_state.chat_history:
-            if msg["role"] == "user":
-                msgs.add_user_message(msg["content"])
-            else:
-                msgs.add_ai_message(msg["content"])
+    msgs = get_chat_history()
     
-    # If both are empty, initialize with welcome message
-    elif not st.session_state.chat_history and not msgs.messages:
-        welcome_msg = "Welcome to Shake Shack! How can I help you today?"
-        msgs.add_ai_message(welcome_msg)
-        st.session_state.chat_history.append({"role": "assistant", "content": welcome_msg})
+    # If empty, initialize with welcome message
+    if not msgs.messages:
+        msgs.add_ai_message("Welcome to Shake Shack! How can I help you today?")
         
     return msgs
 
-def display_chat_history():
+def trim_langchain_history(msgs):
+    """Bound the chat history to the last MAX_CHAT_HISTORY messages."""
+    if len(msgs.messages) > MAX_CHAT_HISTORY:
+        del msgs.messages[:-MAX_CHAT_HISTORY]
+
+def display_chat_history(msgs):
     """Display the chat history."""
-    for message in st.session_state.chat_history:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-
-    # Display last response if any
-    if st.session_state.last_response:
-        response = st.session_state.last_response
-        st.session_state.last_response = None
-        
-        # Avoid duplicate responses
-        last_message = st.session_state.chat_history[-1] if st.session_state.chat_history else None
-        if not last_message or last_message["role"] != "assistant" or last_message["content"] != response:
-            st.session_state.chat_history.append({"role": "assistant", "content": response})
-            # Also add to LangChain history
-            msgs = StreamlitChatMessageHistory(key="langchain_messages")
-            msgs.add_ai_message(response)
-        
-        with st.chat_message("assistant"):
-            st.markdown(response)
+    for message in msgs.messages:
+        with st.chat_message(CHAT_ROLES.get(message.type, "assistant")):
+            st.markdown(message.content)
 
 def handle_user_input(msgs):
     """Handle user input and process messages."""
@@ -150,8 +140,6 @@ def handle_user_input(msgs):
     user_message = st.chat_input("Type your message here...")
     if user_message:
         # Add user message to chat history
-        st.session_state.chat_history.append({"role": "user", "content": user_message})
-        # Also add to LangChain history
         msgs.add_user_message(user_message)
         
         with st.chat_message("user"):
@@ -161,13 +149,16 @@ def handle_user_input(msgs):
         with st.spinner("Thinking..."):
             response = process_message(user_message)
         
+        with st.chat_message("assistant"):
+            if isinstance(response, str):
+                st.markdown(response)
+            else:
+                # LLM answers arrive as a token stream; keep the full text once done
+                response = st.write_stream(response)
+        
         # Add response to chat history
-        st.session_state.chat_history.append({"role": "assistant", "content": response})
-        # Also add to LangChain history
         msgs.add_ai_message(response)
-        
-        with st.chat_message("assistant"):
-            st.markdown(response)
+        trim_langchain_history(msgs)
 
 # Quick actions have been removed as they are not necessary
 
@@ -189,15 +180,14 @@ def render_ui():
     
     # Initialize and display chat history
     msgs = initialize_chat_history()
-    display_chat_history()
+    display_chat_history(msgs)
     
     # Handle user input
     handle_user_input(msgs)
     
-    # Check if sidebar needs updating and rerun if needed
-    if st.session_state.get('update_sidebar', False):
-        st.session_state.update_sidebar = False
-        st.rerun()
+    # Render the order summary last so it shows this run's order changes
+    with st.sidebar:
+        render_order_summary()
 
 # Cleanup function to be called on app shutdown
 def cleanup():
@@ -7,14 +7,24 @@ from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+# Articles and filler words dropped by normalize_item_name, matched in one pass
+STOPWORDS_RE = re.compile(r"\b(?:a|an|the|of|with|and)\b")
+WHITESPACE_RE = re.compile(r"\s+")
+# Markdown code fence (optionally tagged json) around a JSON reply
+CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
 def timeit(func):
     """Decorator to measure function execution time."""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        # Skip the timing entirely when nothing would be logged
+        if not logger.isEnabledFor(logging.INFO):
+            return func(*args, **kwargs)
+        # Monotonic, nanosecond-resolution clock, so sub-millisecond calls are measurable
+        start_ns = time.perf_counter_ns()
         result = func(*args, **kwargs)
-        end_time = time.time()
-        logger.info(f"Function {func.__name__} took {end_time - start_time:.4f} seconds to execute")
+        elapsed_ms = (time.perf_counter_ns() - start_ns) / 1e6
+        logger.info("Function %s took %.3f ms to execute", func.__name__, elapsed_ms)
         return result
     return wrapper
 
@@ -38,10 +48,10 @@ def retry(max_attempts=3, delay=1):
                 except Exception as e:
                     attempts += 1
                     if attempts == max_attempts:
-                        logger.error(f"Function {func.__name__} failed after {max_attempts} attempts. Error: {e}")
+                        logger.error("Function %s failed after %d attempts. Error: %s", func.__name__, max_attempts, e)
                         raise
                     
-                    logger.warning(f"Attempt {attempts} failed for function {func.__name__}. Retrying in {current_delay}s. Error: {e}")
+                    logger.warning("Attempt %d failed for function %s. Retrying in %ss. Error: %s", attempts, func.__name__, current_delay, e)
                     time.sleep(current_delay)
                     current_delay *= 2
                     
@@ -62,17 +72,17 @@ def safe_json_loads(json_str, default=None):
     """
     try:
         # Clean up the JSON string
-        cleaned_json = json_str.replace("```json", "").replace("```", "").strip()
+        cleaned_json = CODE_FENCE_RE.sub("", json_str.strip())
         return json.loads(cleaned_json)
     except Exception as e:
-        logger.error(f"Error parsing JSON: {e}")
+        logger.error("Error parsing JSON: %s", e)
         return default
 
 def create_directory_if_not_exists(directory_path):
     """Create directory if it doesn't exist."""
     if not os.path.exists(directory_path):
         os.makedirs(directory_path)
-        logger.info(f"Created directory: {directory_path}")
+        logger.info("Created directory: %s", directory_path)
 
 def normalize_item_name(name):
     """
@@ -91,11 +101,10 @@ def normalize_item_name(name):
     normalized = name.lower().strip()
     
     # Remove articles and common words
-    for word in ["a", "an", "the", "of", "with", "and"]:
-        normalized = re.sub(r'\b' + word + r'\b', '', normalized)
+    normalized = STOPWORDS_RE.sub('', normalized)
     
     # Remove extra spaces
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = WHITESPACE_RE.sub(' ', normalized).strip()
     
     return normalized
 